@@ -6,7 +6,7 @@ This module is imported by:
 """
 
 import os
-import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -14,20 +14,24 @@ import chess
 import chess.engine
 import mido
 
-from melody.key_ctx import KeyContext
+from melody.engine import EngineContext, EngineSession
+from melody.key_ctx import KeyContext, Phrase
+from melody.midi.clock import timer_resolution
 from melody.midi.earcons import earcon_retry
 from melody.midi.listener import MidiListener
-from melody.midi.playback import play_degrees
+from melody.midi.playback import queue_rendered
+from melody.midi.realtime import boost_realtime
+from melody.midi.scheduler import MidiScheduler
 from melody.midi.ports import (
     open_output_robust,
     pick_input_port,
     pick_output_port,
 )
+from melody.phrases.book import PhraseBook, build_phrase_book
 from melody.phrases.castling import detect_castling_motif
-from melody.phrases.decode_square import decode_black_square, decode_white_square
-from melody.phrases.encode import phrase_for_castling, phrase_for_promotion, phrase_for_square
+from melody.phrases.decode_square import decode_square
 from melody.phrases.promotion import decode_promotion_piece
-from melody.phrases.capture_stream import collect_structural_phrase_stream
+from melody.phrases.capture_stream import iter_phrases
 
 mido.set_backend("mido.backends.rtmidi")
 MIDI_CHANNEL = 0
@@ -35,21 +39,23 @@ MIDI_CHANNEL = 0
 
 # ------------------------------ engine path ------------------------------
 
+@lru_cache(maxsize=1)
 def _resolve_engine_path() -> Path:
     """
     Locate Stockfish executable in this order:
       1) MELODY_STOCKFISH env var (absolute path)
       2) <repo>/tools/stockfish/stockfish.exe
       3) first occurrence of 'stockfish' on PATH
+    Resolved on the first call and cached.
     """
     env_path = os.environ.get("MELODY_STOCKFISH")
     if env_path:
         p = Path(env_path)
-        if p.exists():
+        if p.is_file():
             return p
 
     p = Path(__file__).parents[1] / "tools" / "stockfish" / "stockfish.exe"
-    if p.exists():
+    if p.is_file():
         return p
 
     from shutil import which
@@ -63,20 +69,76 @@ def _resolve_engine_path() -> Path:
     )
 
 
-ENGINE_PATH = _resolve_engine_path()
+def _resolve_engine_nodes(default: int = 50_000) -> Optional[int]:
+    """
+    Node cap per engine move: MELODY_STOCKFISH_NODES env var, else `default`.
+    A value of 0 removes the node cap (the time and depth caps still apply).
+    """
+    env_nodes = os.environ.get("MELODY_STOCKFISH_NODES")
+    if env_nodes:
+        try:
+            nodes = int(env_nodes)
+        except ValueError:
+            print(f"Ignoring MELODY_STOCKFISH_NODES={env_nodes!r} (not an integer).")
+        else:
+            return nodes if nodes > 0 else None
+
+    return default
+
+
+ENGINE_DEPTH = 10  # plenty at UCI_Elo 1500; quiet positions stop here early
+
+
+def _engine_options(engine: chess.engine.SimpleEngine) -> dict:
+    """
+    Strength limit plus search resources: half the cores (at least one) and a
+    64 MB hash, for the options this engine actually offers.
+    """
+    options = {
+        "UCI_LimitStrength": True,
+        "UCI_Elo": 1500,
+        "Threads": max(1, (os.cpu_count() or 1) // 2),
+        "Hash": 64,
+    }
+    return {name: value for name, value in options.items() if name in engine.options}
 
 
 # ------------------------------ small helpers ----------------------------
 
+# Square index ↔ name lookups
+_SQUARE_NAMES = chess.SQUARE_NAMES
+_SQUARE_INDEX = {name: sq for sq, name in enumerate(chess.SQUARE_NAMES)}
+
+# King moves for each (side is White, castle side) the motif can name
+_CASTLE_MOVES = {
+    (True, "kingside"): chess.Move.from_uci("e1g1"),
+    (True, "queenside"): chess.Move.from_uci("e1c1"),
+    (False, "kingside"): chess.Move.from_uci("e8g8"),
+    (False, "queenside"): chess.Move.from_uci("e8c8"),
+}
+
+# Promotion piece type -> the phrase book's piece letter
+_PROMOTION_CHARS = {
+    chess.QUEEN: "q",
+    chess.ROOK: "r",
+    chess.BISHOP: "b",
+    chess.KNIGHT: "n",
+}
+
+
+@lru_cache(maxsize=4096)
+def _mk_move(uci: str) -> chess.Move:
+    """chess.Move.from_uci, memoized; the set of decodable moves is small."""
+    return chess.Move.from_uci(uci)
+
+
 def _decode_square_for_side(
-    degrees,
+    degrees: Phrase,
     side_white: bool,
     landing: bool,
 ) -> Optional[str]:
     """Decode a square for White or Black; allow short-form only on landing."""
-    if side_white:
-        return decode_white_square(degrees, short_form_ok=landing)
-    return decode_black_square(degrees, short_form_ok=landing)
+    return decode_square(degrees, side_white, short_form_ok=landing)
 
 
 def _print_help_banner() -> None:
@@ -110,7 +172,7 @@ def _print_help_banner() -> None:
 def _handle_human_turn(
     board: chess.Board,
     listener: MidiListener,
-    outp: mido.ports.BaseOutput,
+    sched: MidiScheduler,
     ctx: KeyContext,
 ) -> bool:
     """
@@ -121,28 +183,27 @@ def _handle_human_turn(
     side_str = "White" if side_white_to_move else "Black"
     print(f"\nYour move ({side_str}).")
 
-    # First phrase: castling prelude OR start-square phrase.
-    p1 = collect_structural_phrase_stream(
+    # One reader for the whole turn: start, landing and (maybe) promotion phrases.
+    phrases = iter_phrases(
         get_msg=listener.get,
         ctx=ctx,
         min_structural=3,
         use_sustain=True,
     )
 
+    # First phrase: castling prelude OR start-square phrase.
+    p1 = next(phrases)
+
     castle_side = detect_castling_motif(p1)
     if castle_side:
-        move_uci = "e1g1" if side_white_to_move else "e8g8"
-        if castle_side == "queenside":
-            move_uci = "e1c1" if side_white_to_move else "e8c8"
-
-        move = chess.Move.from_uci(move_uci)
-        if move in board.legal_moves:
+        move = _CASTLE_MOVES[side_white_to_move, castle_side]
+        if board.is_legal(move):
             board.push(move)
             print("Last move (you):", move.uci())
             return True
 
         print("Illegal castling attempt; please repeat.")
-        earcon_retry(outp, MIDI_CHANNEL)
+        earcon_retry(sched, MIDI_CHANNEL)
         return False
 
     # Normal move: two phrases (start, landing).
@@ -153,15 +214,18 @@ def _handle_human_turn(
     )
     if not start_sq:
         print("Could not decode start square; please repeat.")
-        earcon_retry(outp, MIDI_CHANNEL)
+        earcon_retry(sched, MIDI_CHANNEL)
         return False
 
-    p2 = collect_structural_phrase_stream(
-        get_msg=listener.get,
-        ctx=ctx,
-        min_structural=3,
-        use_sustain=True,
-    )
+    # Check the start square now, before asking for the landing phrase.
+    from_bb = chess.BB_SQUARES[_SQUARE_INDEX[start_sq]]
+    if not board.occupied_co[side_white_to_move] & from_bb:
+        print(f"No {side_str} piece on {start_sq}; please repeat.")
+        earcon_retry(sched, MIDI_CHANNEL)
+        return False
+    is_pawn = bool(board.pawns & from_bb)
+
+    p2 = next(phrases)
     landing_sq = _decode_square_for_side(
         degrees=p2,
         side_white=side_white_to_move,
@@ -169,91 +233,131 @@ def _handle_human_turn(
     )
     if not landing_sq:
         print("Could not decode landing square; please repeat.")
-        earcon_retry(outp, MIDI_CHANNEL)
+        earcon_retry(sched, MIDI_CHANNEL)
         return False
 
     if start_sq == landing_sq:
         print(f"Start and landing are identical ({start_sq}). Please repeat.")
-        earcon_retry(outp, MIDI_CHANNEL)
+        earcon_retry(sched, MIDI_CHANNEL)
         return False
 
-    tentative = chess.Move.from_uci(start_sq + landing_sq)
+    tentative = _mk_move(start_sq + landing_sq)
 
     # Promotion: request third phrase only when required.
-    if tentative not in board.legal_moves:
-        from_sq = chess.parse_square(start_sq)
-        to_sq = chess.parse_square(landing_sq)
-        piece = board.piece_at(from_sq)
-
-        if piece and piece.piece_type == chess.PAWN:
-            dest_rank = chess.square_rank(to_sq)
-            if dest_rank in (0, 7):
-                print("Promotion cue: anchor – ♭2, then steps 1..4 (r, n, b, q).")
-                p3 = collect_structural_phrase_stream(
-                    get_msg=listener.get,
-                    ctx=ctx,
-                    min_structural=2,
-                    use_sustain=True,
-                )
-                promo = decode_promotion_piece(p3)
-                if promo:
-                    tentative = chess.Move.from_uci(start_sq + landing_sq + promo)
-
-    if tentative in board.legal_moves:
+    if (
+        is_pawn
+        and chess.BB_SQUARES[_SQUARE_INDEX[landing_sq]] & chess.BB_BACKRANKS
+        and not board.is_legal(tentative)
+    ):
+        print("Promotion cue: anchor – ♭2, then steps 1..4 (r, n, b, q).")
+        p3 = phrases.send(2)  # promotion phrases can be two degrees long
+        promo = decode_promotion_piece(p3)
+        if promo:
+            tentative = _mk_move(start_sq + landing_sq + promo)
+
+    if board.is_legal(tentative):
         board.push(tentative)
         print("Last move (you):", tentative.uci())
         return True
 
     bad = tentative.uci() if tentative else "(none)"
     print(f"Illegal move {bad}; please repeat.")
-    earcon_retry(outp, MIDI_CHANNEL)
+    earcon_retry(sched, MIDI_CHANNEL)
     return False
 
 
 def _handle_engine_turn(
     board: chess.Board,
-    engine: chess.engine.SimpleEngine,
-    outp: mido.ports.BaseOutput,
-    ctx: KeyContext,
+    session: EngineSession,
+    sched: MidiScheduler,
+    book: PhraseBook,
 ) -> None:
-    """Ask Stockfish for a move, render its phrases, and push the move."""
+    """Ask Stockfish for a move, push it, start pondering, and queue its phrases."""
     mover_is_white = board.turn
     print(f"\nEngine move ({'White' if mover_is_white else 'Black'}) thinking...")
 
-    result = engine.play(board, chess.engine.Limit(time=0.7))
+    result = session.play(board)
     move = result.move
     print("Engine:", move.uci())
 
-    # Render phrases before pushing (use mover’s color rules).
-    sq_from = chess.square_name(move.from_square)
-    sq_to = chess.square_name(move.to_square)
+    # Push first so the engine ponders while its phrases are still playing.
+    # A king moving two files is castling; read it off the king bitboard first.
+    castling = bool(board.kings & chess.BB_SQUARES[move.from_square]) and (
+        abs(move.from_square - move.to_square) == 2
+    )
+    board.push(move)
+    session.ponder(board, result.ponder)
+
+    # Render phrases (use mover’s color rules); all are pre-rendered in `book`.
+    sq_from = _SQUARE_NAMES[move.from_square]
+    sq_to = _SQUARE_NAMES[move.to_square]
 
-    if board.is_castling(move):
-        kingside = sq_to in ("g1", "g8")
-        degrees = phrase_for_castling(side_white=mover_is_white, kingside=kingside)
-        play_degrees(outp, ctx, degrees, MIDI_CHANNEL)
+    # Queue every phrase up front, each a fixed gap after the previous one's end
+    # deadline; the scheduler thread plays them while we go back to listening.
+    if castling:
+        kingside = move.to_square > move.from_square
+        queue_rendered(sched, book.castling[mover_is_white, kingside])
     else:
-        play_degrees(outp, ctx, phrase_for_square(sq_from, mover_is_white), MIDI_CHANNEL)
-        time.sleep(0.15)
-        play_degrees(outp, ctx, phrase_for_square(sq_to, mover_is_white), MIDI_CHANNEL)
+        end_ns = queue_rendered(sched, book.squares[sq_from, mover_is_white])
+        end_ns = queue_rendered(sched, book.squares[sq_to, mover_is_white], end_ns + 150_000_000)
 
         if move.promotion:
-            piece_char = {
-                chess.QUEEN: "q",
-                chess.ROOK: "r",
-                chess.BISHOP: "b",
-                chess.KNIGHT: "n",
-            }[move.promotion]
-            time.sleep(0.12)
-            play_degrees(outp, ctx, phrase_for_promotion(piece_char, mover_is_white), MIDI_CHANNEL)
+            piece_char = _PROMOTION_CHARS[move.promotion]
+            queue_rendered(sched, book.promotion[piece_char, mover_is_white], end_ns + 120_000_000)
 
-    board.push(move)
     print("Last move (engine):", move.uci())
 
 
 # ----------------------------------- main --------------------------------
 
-def main() -> None:
+def _play_game(
+    board: chess.Board,
+    human_is_white: bool,
+    listener: MidiListener,
+    sched: MidiScheduler,
+    session: EngineSession,
+    ctx: KeyContext,
+    book: PhraseBook,
+) -> chess.Outcome:
+    """
+    Alternate human and engine turns until the game is over; return how it ended.
+
+    Termination is only re-checked after a move is pushed; a rejected human
+    attempt leaves the position unchanged, so it just retries.
+    """
+    outcome = board.outcome()
+    while outcome is None:
+        if board.turn == human_is_white:
+            moved = _handle_human_turn(board, listener, sched, ctx)
+            if not moved:
+                continue
+        else:
+            _handle_engine_turn(board, session, sched, book)
+
+        outcome = board.outcome()
+
+    return outcome
+
+
+def _drain_input(listener: MidiListener) -> None:
+    """Discard every event queued so far."""
+    while listener.get_nowait() is not None:
+        pass
+
+
+def _ask_rematch() -> bool:
+    """Prompt for another game; anything but y/yes (or no stdin) ends the run."""
+    try:
+        answer = input("\nPlay again? [y/N] ")
+    except EOFError:
+        return False
+    return answer.strip().lower() in ("y", "yes")
+
+
+def _run() -> None:
+    engine_path = _resolve_engine_path()  # fail before touching MIDI if it's missing
+    engine_nodes = _resolve_engine_nodes()
+
     # MIDI setup
     in_name = pick_input_port()
     out_name = pick_output_port()
@@ -261,31 +365,46 @@ def main() -> None:
     print(f"MIDI out: {out_name}")
 
     ctx = KeyContext(tonic_midi=60, phrase_gap_ms=500)
+    book = build_phrase_book(ctx, MIDI_CHANNEL)  # every engine phrase, rendered once
     _print_help_banner()
 
-    with MidiListener(in_name) as listener, open_output_robust(out_name) as outp:
-        engine = chess.engine.SimpleEngine.popen_uci(str(ENGINE_PATH))
-        engine.configure({"UCI_LimitStrength": True, "UCI_Elo": 1500})
+    boost_realtime()  # best effort; see midi/realtime.py
+
+    with (
+        MidiListener(in_name) as listener,
+        open_output_robust(out_name) as outp,
+        MidiScheduler(outp) as sched,
+    ):
+        # One engine process for the whole run; games are separated by ucinewgame.
+        engine = chess.engine.SimpleEngine.popen_uci(str(engine_path))
+        engine.configure(_engine_options(engine))
+        session = EngineSession(
+            engine,
+            EngineContext(move_time_s=0.7, nodes=engine_nodes, depth=ENGINE_DEPTH, ponder=True),
+        )
 
-        board = chess.Board()
         human_is_white = True  # set to False to play Black
 
         try:
-            while not board.is_game_over():
-                human_turn = (board.turn and human_is_white) or (
-                    (not board.turn) and (not human_is_white)
-                )
-
-                if human_turn:
-                    moved = _handle_human_turn(board, listener, outp, ctx)
-                    if not moved:
-                        continue
-                else:
-                    _handle_engine_turn(board, engine, outp, ctx)
+            while True:
+                board = chess.Board()
+                outcome = _play_game(board, human_is_white, listener, sched, session, ctx, book)
+                reason = outcome.termination.name.lower().replace("_", " ")
+                print(f"\nResult: {outcome.result()} ({reason})")
 
-            print("\nResult:", board.result())
-            engine.quit()
+                if not _ask_rematch():
+                    break
+                session.new_game()
+                _drain_input(listener)  # notes played at the prompt aren't a first phrase
 
         except KeyboardInterrupt:
             print("\nInterrupted. Exiting...")
-            engine.quit()
+
+        finally:
+            session.close()
+
+
+def main() -> None:
+    # 1 ms sleeps for note timing on Windows (no-op elsewhere)
+    with timer_resolution(1):
+        _run()
@@ -0,0 +1,131 @@
+"""
+Stockfish session: engine moves, with optional pondering on the human's time.
+
+While the human plays their phrases, the engine searches the position after
+the reply it expects (the `ponder` move from its last search). If the human
+plays that move, the background search becomes the engine's answer.
+
+One session (and one Stockfish process) lasts for every game in a run;
+.new_game() tells the engine a fresh game starts (UCI `ucinewgame`).
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import chess
+import chess.engine
+
+
+@dataclass(slots=True)
+class EngineContext:
+    """Search limits and pondering configuration."""
+
+    move_time_s: float = 0.7      # hard time cap per engine move
+    nodes: Optional[int] = None   # node cap per engine move (first limit hit wins)
+    depth: Optional[int] = None   # depth cap per engine move (first limit hit wins)
+    ponder: bool = True           # keep searching while the human plays
+    ponder_time_s: float = 60.0   # time cap for one background search (same node/depth caps)
+
+
+def _play_result(
+    analysis: chess.engine.SimpleAnalysisResult,
+) -> Optional[chess.engine.PlayResult]:
+    """
+    Best move of a finished analysis, or None if it found none. The expected
+    reply is the `ponder` move from bestmove, else the second move of the PV,
+    so pondering still has a guess when the engine doesn't name one.
+    """
+    best = analysis.wait()
+    if best.move is None:
+        return None
+
+    ponder = best.ponder
+    if ponder is None:
+        pv = analysis.info.get("pv", ())
+        if len(pv) > 1 and pv[0] == best.move:
+            ponder = pv[1]
+    return chess.engine.PlayResult(best.move, ponder)
+
+
+class EngineSession:
+    """
+    Wrap a SimpleEngine with pondering.
+
+    Call .play(board) on engine turns and .ponder(board, guess) right after
+    the engine's move is pushed. On a ponder hit, .play returns the result of
+    the background search instead of starting a new one.
+    """
+
+    def __init__(self, engine: chess.engine.SimpleEngine, ectx: EngineContext):
+        self._engine = engine
+        self._ectx = ectx
+        self._analysis: Optional[chess.engine.SimpleAnalysisResult] = None
+        self._ponder_move: Optional[chess.Move] = None
+        self._ponder_ply = 0
+        self._game = object()  # a new key makes python-chess send ucinewgame
+
+    def play(self, board: chess.Board) -> chess.engine.PlayResult:
+        """Return the engine's move for `board`, reusing the ponder search on a hit."""
+        result = self._finish_ponder(self._is_ponder_hit(board))
+        if result is not None:
+            return result
+
+        return self._engine.play(board, self._move_limit(), game=self._game)
+
+    def _is_ponder_hit(self, board: chess.Board) -> bool:
+        """True if `board` is the position the background search is on."""
+        return (
+            self._ponder_move is not None
+            and len(board.move_stack) == self._ponder_ply
+            and board.peek() == self._ponder_move
+        )
+
+    def ponder(self, board: chess.Board, guess: Optional[chess.Move]) -> None:
+        """Start searching the position after `guess` (the expected human reply)."""
+        if not self._ectx.ponder or guess is None or not board.is_legal(guess):
+            return
+
+        predicted = board.copy()
+        predicted.push(guess)
+        self._analysis = self._engine.analysis(predicted, self._ponder_limit(), game=self._game)
+        self._ponder_move = guess
+        self._ponder_ply = len(predicted.move_stack)
+
+    def _move_limit(self) -> chess.engine.Limit:
+        """
+        Time-capped search that also stops at the node/depth cap, whichever
+        comes first, so easy positions answer early.
+        """
+        ectx = self._ectx
+        return chess.engine.Limit(time=ectx.move_time_s, nodes=ectx.nodes, depth=ectx.depth)
+
+    def _ponder_limit(self) -> chess.engine.Limit:
+        """
+        The regular node/depth caps with only the time bound raised, so a
+        ponder hit plays no stronger than a fresh search would.
+        """
+        ectx = self._ectx
+        return chess.engine.Limit(time=ectx.ponder_time_s, nodes=ectx.nodes, depth=ectx.depth)
+
+    def new_game(self) -> None:
+        """Drop any background search and start a new game on the same engine."""
+        self._finish_ponder(hit=False)
+        self._game = object()
+
+    def _finish_ponder(self, hit: bool) -> Optional[chess.engine.PlayResult]:
+        """Stop the background search; return its best move only on a hit."""
+        analysis = self._analysis
+        if analysis is None:
+            return None
+
+        self._analysis = None
+        self._ponder_move = None
+
+        analysis.stop()
+        analysis.wait()
+        return _play_result(analysis) if hit else None
+
+    def close(self) -> None:
+        """Stop any background search and shut the engine down."""
+        self._finish_ponder(hit=False)
+        self._engine.quit()
@@ -11,25 +11,62 @@ Degree mapping (relative to the tonic's pitch class):
   10, 11   → 7   (Bb/B)
 """
 
-from dataclasses import dataclass
-from typing import Dict, Tuple
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Tuple
 
+Degree = Tuple[int, int]  # (degree, alteration)
+Phrase = bytes            # packed steps, one byte per (degree, alteration); see pack_step()
 
-# Semitone bucket → degree
-BUCKET_MAP: Dict[int, int] = {
-    0: 1,
-    1: 2, 2: 2,
-    3: 3, 4: 3,
-    5: 4, 6: 4,
-    7: 5,
-    8: 6, 9: 6,
-    10: 7, 11: 7,
-}
+# Semitone bucket (index 0..11) → degree
+BUCKET_MAP: Tuple[int, ...] = (
+    1,
+    2, 2,
+    3, 3,
+    4, 4,
+    5,
+    6, 6,
+    7, 7,
+)
 
-# Diatonic offsets for playback / alteration computation (in semitones)
-DEGREE_OFFSETS: Dict[int, int] = {
-    1: 0, 2: 2, 3: 4, 4: 5, 5: 7, 6: 9, 7: 11, 8: 12
-}
+# Degree (index 1..8) → diatonic offset for playback / alteration computation
+# (in semitones); index 0 is padding so degrees index directly
+DEGREE_OFFSETS: Tuple[int, ...] = (0, 0, 2, 4, 5, 7, 9, 11, 12)
+
+
+def pack_step(degree: int, alt: int = 0) -> int:
+    """Pack (degree, alteration) into one byte: (degree << 2) | (alt + 1)."""
+    return (degree << 2) | (alt + 1)
+
+
+def pack_phrase(degrees: Iterable[Degree]) -> Phrase:
+    """Pack a (degree, alteration) sequence into a Phrase."""
+    return bytes(pack_step(d, a) for d, a in degrees)
+
+
+def _degree_alt(rel_pc: int) -> Degree:
+    """(degree, alteration) for a pitch class relative to the tonic (0..11)."""
+    degree = BUCKET_MAP[rel_pc]
+    base_pc = DEGREE_OFFSETS[degree] % 12
+    diff = (rel_pc - base_pc) % 12
+
+    if diff == 0:
+        alt = 0
+    elif diff == 1:
+        alt = +1
+    elif diff == 11:  # == -1 mod 12
+        alt = -1
+    else:
+        alt = 0
+
+    return degree, alt
+
+
+# Relative pitch class → (degree, alteration), precomputed for degree_of()
+DEGREE_ALT_TABLE: Tuple[Degree, ...] = tuple(_degree_alt(pc) for pc in range(12))
+
+# Same table as packed steps, for step_of()
+STEP_TABLE: Tuple[int, ...] = tuple(pack_step(d, a) for d, a in DEGREE_ALT_TABLE)
+OCTAVE_ANCHOR_STEP = pack_step(8)
 
 
 @dataclass(slots=True)
@@ -40,7 +77,19 @@ class KeyContext:
     phrase_gap_ms: int = 500              # time-gap boundary (when not using pedal)
     octave_anchor_threshold: int = 12     # ≥ +12 semitones → degree 8 (octave)
 
-    def degree_of(self, midi_note: int) -> Tuple[int, int]:
+    # Derived: phrase_gap_ms as integer nanoseconds, for perf_counter_ns() math
+    phrase_gap_ns: int = field(init=False, repr=False)
+
+    # Degree (index 1..8) → MIDI note at octave_shift 0; index 0 is unused
+    _midi_by_degree: Tuple[Optional[int], ...] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.phrase_gap_ns = self.phrase_gap_ms * 1_000_000
+        self._midi_by_degree = (None,) + tuple(
+            self.tonic_midi + offset for offset in DEGREE_OFFSETS[1:]
+        )
+
+    def degree_of(self, midi_note: int) -> Degree:
         """
         Convert a MIDI note to (degree, alteration).
 
@@ -50,26 +99,24 @@ class KeyContext:
         Alteration is -1, 0, or +1 relative to the diatonic offset of the
         chosen degree (used to detect #4, ♭2/♭3 in motifs).
         """
-        rel_pc = (midi_note - self.tonic_midi) % 12
-        degree = BUCKET_MAP[rel_pc]
+        rel = midi_note - self.tonic_midi
+        rel_pc = rel % 12
 
         # Explicit octave anchor: tonic at or above one octave → degree 8
-        if rel_pc == 0 and midi_note - self.tonic_midi >= self.octave_anchor_threshold:
+        if rel_pc == 0 and rel >= self.octave_anchor_threshold:
             return 8, 0
 
-        base_pc = DEGREE_OFFSETS[degree] % 12
-        diff = (rel_pc - base_pc) % 12
+        return DEGREE_ALT_TABLE[rel_pc]
+
+    def step_of(self, midi_note: int) -> int:
+        """degree_of() as a packed step (see pack_step)."""
+        rel = midi_note - self.tonic_midi
+        rel_pc = rel % 12
 
-        if diff == 0:
-            alt = 0
-        elif diff == 1:
-            alt = +1
-        elif diff == 11:  # == -1 mod 12
-            alt = -1
-        else:
-            alt = 0
+        if rel_pc == 0 and rel >= self.octave_anchor_threshold:
+            return OCTAVE_ANCHOR_STEP
 
-        return degree, alt
+        return STEP_TABLE[rel_pc]
 
     def midi_of_degree(self, degree: int, octave_shift: int = 0) -> int:
         """
@@ -78,5 +125,4 @@ class KeyContext:
         Degree 8 uses +12 semitones; other degrees use diatonic offsets.
         `octave_shift` shifts by whole octaves after the base mapping.
         """
-        base = 12 if degree == 8 else DEGREE_OFFSETS[degree]
-        return self.tonic_midi + base + 12 * octave_shift
+        return self._midi_by_degree[degree] + 12 * octave_shift
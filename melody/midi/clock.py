@@ -0,0 +1,46 @@
+"""Absolute-deadline timing helpers for MIDI I/O."""
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# A lock or Event wait with no timeout can't be interrupted by Ctrl+C on
+# Windows, so blocking waits there wake up this often; elsewhere they block
+# outright.
+HEARTBEAT_S: Optional[float] = 0.5 if sys.platform == "win32" else None
+
+
+def sleep_until(deadline_ns: int) -> None:
+    """
+    Sleep until `deadline_ns` (a time.perf_counter_ns() value).
+
+    Scheduling against absolute deadlines keeps sleep overshoot from
+    accumulating across a phrase; a deadline already passed returns at once.
+    """
+    remaining_ns = deadline_ns - time.perf_counter_ns()
+    if remaining_ns > 0:
+        time.sleep(remaining_ns / 1e9)
+
+
+@contextmanager
+def timer_resolution(period_ms: int = 1) -> Iterator[None]:
+    """
+    Raise the Windows system timer resolution for the duration of the block.
+
+    The default ~15.6 ms tick quantizes time.sleep() on older Pythons; the
+    period is restored on exit. Does nothing on other platforms.
+    """
+    if sys.platform != "win32":
+        yield
+        return
+
+    import ctypes
+
+    winmm = ctypes.WinDLL("winmm")
+    raised = winmm.timeBeginPeriod(period_ms) == 0  # TIMERR_NOERROR
+    try:
+        yield
+    finally:
+        if raised:
+            winmm.timeEndPeriod(period_ms)
@@ -1,17 +1,16 @@
 """Simple, unobtrusive earcons."""
 
-import time
-import mido
+from melody.midi.playback import note_schedule, play_rendered
+from melody.midi.scheduler import MidiScheduler
 
 
-def earcon_retry(outp: mido.ports.BaseOutput, channel: int = 0) -> None:
+def earcon_retry(sched: MidiScheduler, channel: int = 0) -> None:
     """
     Two short low beeps: gentle “please repeat” cue.
     No “OK” earcon by design, to keep the flow minimal.
     """
     note = 48  # C3
-    for _ in range(2):
-        outp.send(mido.Message("note_on", note=note, velocity=100, channel=channel))
-        time.sleep(0.12)
-        outp.send(mido.Message("note_off", note=note, channel=channel))
-        time.sleep(0.08)
+    beeps = note_schedule(
+        bytes((note, note)), channel, ms_per_note=120, gap_ms=80  # 120 ms beep + 80 ms rest
+    )
+    play_rendered(sched, beeps)
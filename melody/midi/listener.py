@@ -1,40 +1,117 @@
-"""Queue-backed MIDI input listener for responsive (non-blocking) reads."""
+"""Queue-backed MIDI input listener with blocking reads and sentinel shutdown."""
 
+import time
 from contextlib import AbstractContextManager
 from queue import Queue, Empty
 from typing import Optional
 
-import mido
+import rtmidi
+
+from melody.midi.clock import HEARTBEAT_S
+from melody.midi.realtime import boost_thread_priority
+from melody.midi.status import CONTROL_CHANGE, NOTE_ON, SUSTAIN_PEDAL, MidiEvent
+
+# Queued by close() to wake a blocked get()
+_STOP = object()
 
 
 class MidiListener(AbstractContextManager):
     """
-    Open a MIDI input with a callback that enqueues messages.
+    Open a MIDI input with an rtmidi callback that enqueues timestamped events.
+
+    The callback receives raw bytes from python-rtmidi and stamps them with
+    `time.perf_counter_ns()` as they arrive, so timing does not depend on when
+    the consumer gets around to reading them. Only note-ons (velocity > 0) and
+    sustain-pedal changes are queued, as plain int tuples; no mido.Message is
+    built per event.
+
+    The first callback raises the priority of the backend's input thread
+    (best effort), so arrival stamps aren't delayed behind background work.
 
-    Use .get(timeout) to poll; returns a mido Message or None.
-    Works well with Ctrl+C since there is no blocking receive().
+    .get() blocks until the next event and returns None once the listener is
+    closed; .get(timeout) returns None if nothing arrives in time. Idle waits
+    don't wake up on a fixed poll interval (except for a Ctrl+C heartbeat on
+    Windows).
     """
 
     def __init__(self, port_name: str):
         self._queue: Queue = Queue()
         self._port_name = port_name
-        self._port = mido.open_input(port_name, callback=self._queue.put)
+        self._boosted = False  # input thread priority raised yet
+
+        port = rtmidi.MidiIn()
+        ports = port.get_ports()
+        if port_name not in ports:
+            port.delete()
+            raise OSError(f"unknown MIDI input port {port_name!r}")
+        port.open_port(ports.index(port_name))
+        port.set_callback(self._on_message)
+        self._port: Optional[rtmidi.MidiIn] = port
+
+    def _on_message(self, event, data=None) -> None:
+        if not self._boosted:
+            self._boosted = True
+            boost_thread_priority()  # runs on the backend's input thread
+
+        message, _delta = event
+        if len(message) != 3:
+            return
+
+        status, data1, data2 = message
+        status &= 0xF0
+        # Only note-ons and the sustain pedal matter to capture; drop the rest
+        # (note-offs, other controllers, aftertouch) before they reach the queue.
+        if (status == NOTE_ON and data2 > 0) or (
+            status == CONTROL_CHANGE and data1 == SUSTAIN_PEDAL
+        ):
+            self._queue.put((time.perf_counter_ns(), status, data1, data2))
 
     @property
     def port_name(self) -> str:
         return self._port_name
 
-    def get(self, timeout: float = 0.10) -> Optional[mido.Message]:
-        """Return the next message or None if no message within `timeout` seconds."""
+    def get(self, timeout: Optional[float] = None) -> Optional[MidiEvent]:
+        """
+        Return the next (arrival_ns, status, data1, data2). Blocks when `timeout`
+        is None; returns None on timeout or once the listener is closed.
+        """
+        if timeout is None:
+            while True:
+                try:
+                    event = self._queue.get(timeout=HEARTBEAT_S)
+                    break
+                except Empty:
+                    continue
+        else:
+            try:
+                event = self._queue.get(timeout=timeout)
+            except Empty:
+                return None
+
+        if event is _STOP:
+            self._queue.put(_STOP)  # keep later readers from blocking
+            return None
+        return event
+
+    def get_nowait(self) -> Optional[MidiEvent]:
+        """Return the next queued event, or None if there is none right now."""
         try:
-            return self._queue.get(timeout=timeout)
+            event = self._queue.get_nowait()
         except Empty:
             return None
 
+        if event is _STOP:
+            self._queue.put(_STOP)
+            return None
+        return event
+
     def close(self) -> None:
         if self._port is not None:
-            self._port.close()
+            self._port.cancel_callback()
+            self._port.close_port()
+            self._port.delete()
             self._port = None
+            self._queue.put(_STOP)
 
     # Context manager support
     def __enter__(self) -> "MidiListener":
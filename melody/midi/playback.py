@@ -1,29 +1,101 @@
-"""Playback of degree sequences as MIDI notes."""
+"""Playback of packed phrases as MIDI notes."""
 
 import time
-from typing import Iterable, Tuple
+from functools import lru_cache
+from typing import Optional, Tuple
 
-import mido
+from melody.key_ctx import KeyContext, Phrase
+from melody.midi.clock import sleep_until
+from melody.midi.scheduler import MidiScheduler, RawMessage, Schedule
+from melody.midi.status import NOTE_OFF, NOTE_ON
 
-from melody.key_ctx import KeyContext
 
-Degree = Tuple[int, int]  # (degree, alteration)
+@lru_cache(maxsize=16)
+def note_messages(
+    channel: int = 0,
+    velocity: int = 100,
+) -> Tuple[Tuple[RawMessage, ...], Tuple[RawMessage, ...]]:
+    """Raw note-on and note-off messages for all 128 notes on `channel`, built once."""
+    ons = tuple(bytes((NOTE_ON | channel, n, velocity)) for n in range(128))
+    offs = tuple(bytes((NOTE_OFF | channel, n, 64)) for n in range(128))  # mido default
+    return ons, offs
+
+
+@lru_cache(maxsize=512)
+def note_schedule(
+    notes: bytes,
+    channel: int = 0,
+    ms_per_note: int = 220,
+    gap_ms: int = 40,
+) -> Tuple[Schedule, int]:
+    """
+    Pre-encoded (offset_ns, message) events for a run of MIDI notes, and the
+    total length in ns including the trailing gap. Cached per note run.
+    """
+    note_on, note_off = note_messages(channel)
+    note_ns = ms_per_note * 1_000_000
+    step_ns = (ms_per_note + gap_ms) * 1_000_000
+
+    events = []
+    for i, note in enumerate(notes):
+        on_at = i * step_ns
+        events.append((on_at, note_on[note]))
+        events.append((on_at + note_ns, note_off[note]))
+    return tuple(events), len(notes) * step_ns
+
+
+Rendered = Tuple[Schedule, int]  # (note events, length in ns incl. trailing gap)
 
 
-def play_degrees(
-    outp: mido.ports.BaseOutput,
+def render_degrees(
     ctx: KeyContext,
-    degrees: Iterable[Degree],
+    degrees: Phrase,
     channel: int = 0,
     ms_per_note: int = 220,
-) -> None:
+    gap_ms: int = 40,
+) -> Rendered:
     """
-    Render degrees as short notes. Degree 8 renders as tonic + 12 semitones,
-    which naturally places Black phrases an octave above White.
+    Map a phrase to MIDI notes for `ctx` and pre-encode its note events.
+    Degree 8 renders as tonic + 12 semitones, which naturally places Black
+    phrases an octave above White.
     """
-    for deg, _ in degrees:
-        note = ctx.midi_of_degree(deg)
-        outp.send(mido.Message("note_on", note=note, velocity=100, channel=channel))
-        time.sleep(ms_per_note / 1000.0)
-        outp.send(mido.Message("note_off", note=note, channel=channel))
-        time.sleep(0.04)
+    midi_of = ctx.midi_of_degree
+    notes = bytes(midi_of(step >> 2) for step in degrees)
+    return note_schedule(notes, channel, ms_per_note, gap_ms)
+
+
+def play_rendered(
+    sched: MidiScheduler,
+    rendered: Rendered,
+    start_ns: Optional[int] = None,
+) -> int:
+    """
+    Hand a rendered phrase to the scheduler thread to start at `start_ns`
+    (a perf_counter_ns() deadline; default now, or later if earlier phrases
+    are still queued) and wait out its trailing gap. Returns that end time,
+    so a following phrase can be placed against it.
+    """
+    schedule, length_ns = rendered
+    if start_ns is None:
+        start_ns = time.perf_counter_ns()
+    start_ns = sched.play(schedule, start_ns, length_ns)
+    end_ns = start_ns + length_ns
+    sleep_until(end_ns)
+    return end_ns
+
+
+def queue_rendered(
+    sched: MidiScheduler,
+    rendered: Rendered,
+    start_ns: Optional[int] = None,
+) -> int:
+    """
+    Like play_rendered, but return at once: the scheduler thread plays the
+    phrase at `start_ns` (default now) while the caller moves on. Returns the
+    phrase's end time for placing the next one.
+    """
+    schedule, length_ns = rendered
+    if start_ns is None:
+        start_ns = time.perf_counter_ns()
+    return sched.submit(schedule, start_ns, length_ns) + length_ns
+
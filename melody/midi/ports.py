@@ -1,50 +1,114 @@
 """MIDI port discovery and robust open helpers."""
 
 import time
+from functools import lru_cache
+from typing import Iterator, Sequence, Tuple, Union
+
 import mido
 
 # RtMidi backend on Windows
 mido.set_backend("mido.backends.rtmidi")
 
 
-def pick_input_port(preferred_substring: str = "usb-midi") -> str:
-    """Pick an input port, favoring names containing `preferred_substring`."""
-    ports = mido.get_input_names()
+@lru_cache(maxsize=1)
+def _cached_inputs() -> Tuple[str, ...]:
+    return tuple(mido.get_input_names())
+
+
+@lru_cache(maxsize=1)
+def _cached_outputs() -> Tuple[str, ...]:
+    return tuple(mido.get_output_names())
+
+
+@lru_cache(maxsize=4)
+def _casefolded(ports: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(name.casefold() for name in ports)
+
+
+Preferred = Union[str, Sequence[str]]  # one substring, or several in priority order
+
+
+def _pick(ports: Tuple[str, ...], preferred: Preferred, fallback: str) -> str:
+    """
+    First port matching the highest-priority preferred substring that matches
+    any port (case-insensitive); `fallback` if none does.
+    """
+    if isinstance(preferred, str):
+        preferred = (preferred,)
+
+    folded_ports = _casefolded(ports)
+    for substring in preferred:
+        needle = substring.casefold()
+        match = next((name for name, f in zip(ports, folded_ports) if needle in f), None)
+        if match is not None:
+            return match
+    return fallback
+
+
+def invalidate() -> None:
+    """Forget the cached port lists (after a device change or a failed open)."""
+    _cached_inputs.cache_clear()
+    _cached_outputs.cache_clear()
+    _casefolded.cache_clear()
+
+
+def pick_input_port(preferred: Preferred = "usb-midi") -> str:
+    """
+    Pick an input port, favoring names containing `preferred`: a substring,
+    or a list of substrings in priority order (e.g. ["kawai", "usb-midi"]).
+    """
+    ports = _cached_inputs()
     if not ports:
         raise RuntimeError("No MIDI input ports found.")
-    for name in ports:
-        if preferred_substring.lower() in name.lower():
-            return name
-    return ports[0]
+    return _pick(ports, preferred, ports[0])
 
 
-def pick_output_port(preferred_substring: str = "usb-midi") -> str:
-    """Pick an output port, favoring names containing `preferred_substring`."""
-    ports = mido.get_output_names()
+def pick_output_port(preferred: Preferred = "usb-midi") -> str:
+    """
+    Pick an output port, favoring names containing `preferred`: a substring,
+    or a list of substrings in priority order (e.g. ["kawai", "usb-midi"]).
+    """
+    ports = _cached_outputs()
     if not ports:
         raise RuntimeError("No MIDI output ports found.")
-    for name in ports:
-        if preferred_substring.lower() in name.lower():
-            return name
-    return ports[-1]
+    return _pick(ports, preferred, ports[-1])
+
+
+def _backoff(attempts: int, delay_s: float, max_delay_s: float) -> Iterator[float]:
+    """
+    Sleep before each attempt: none before the first, then delay_s,
+    2*delay_s, … capped at max_delay_s (no sleep after the last attempt).
+    """
+    delay = 0.0
+    for _ in range(attempts):
+        yield delay
+        delay = min(delay * 2, max_delay_s) if delay else delay_s
 
 
 def open_input_robust(
     name: str,
-    attempts: int = 3,
-    delay_s: float = 0.5,
+    attempts: int = 7,
+    delay_s: float = 0.05,
+    max_delay_s: float = 1.0,
 ) -> mido.ports.BaseInput:
-    """Open an input port with retries, then fall back to the first port."""
+    """
+    Open an input port, retrying with exponential backoff (`delay_s` doubling
+    up to `max_delay_s`), then fall back to the first port with a warning.
+    The defaults wait about 2.5 s in total, so a slow-to-appear device is
+    still picked up before falling back.
+    """
     last_exc: Exception | None = None
-    for _ in range(attempts):
+    for delay in _backoff(attempts, delay_s, max_delay_s):
+        time.sleep(delay)
         try:
             return mido.open_input(name)
         except Exception as exc:  # noqa: BLE001
             last_exc = exc
-            time.sleep(delay_s)
 
-    fallback = mido.get_input_names()
+    invalidate()  # the named port failed; rescan before falling back
+    fallback = _cached_inputs()
     if fallback:
+        print(f"Could not open MIDI input '{name}' ({last_exc!r}); using '{fallback[0]}'.")
         return mido.open_input(fallback[0])
 
     raise RuntimeError(
@@ -54,20 +118,28 @@ def open_input_robust(
 
 def open_output_robust(
     name: str,
-    attempts: int = 3,
-    delay_s: float = 0.5,
+    attempts: int = 7,
+    delay_s: float = 0.05,
+    max_delay_s: float = 1.0,
 ) -> mido.ports.BaseOutput:
-    """Open an output port with retries, then fall back to the last port."""
+    """
+    Open an output port, retrying with exponential backoff (`delay_s` doubling
+    up to `max_delay_s`), then fall back to the last port with a warning.
+    The defaults wait about 2.5 s in total, so a slow-to-appear device is
+    still picked up before falling back.
+    """
     last_exc: Exception | None = None
-    for _ in range(attempts):
+    for delay in _backoff(attempts, delay_s, max_delay_s):
+        time.sleep(delay)
         try:
             return mido.open_output(name)
         except Exception as exc:  # noqa: BLE001
             last_exc = exc
-            time.sleep(delay_s)
 
-    fallback = mido.get_output_names()
+    invalidate()
+    fallback = _cached_outputs()
     if fallback:
+        print(f"Could not open MIDI output '{name}' ({last_exc!r}); using '{fallback[-1]}'.")
         return mido.open_output(fallback[-1])
 
     raise RuntimeError(
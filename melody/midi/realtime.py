@@ -0,0 +1,59 @@
+"""Best-effort process tuning for steadier MIDI timing."""
+
+import ctypes
+import ctypes.util
+import os
+import sys
+
+_HIGH_PRIORITY_CLASS = 0x00000080
+_THREAD_PRIORITY_HIGHEST = 2
+_MCL_CURRENT = 1
+_MCL_FUTURE = 2
+
+
+def boost_realtime() -> bool:
+    """
+    Raise this process's priority (Windows) or lock its pages in RAM (Linux),
+    so note timing isn't disturbed by background load or page faults.
+    Returns True if a boost was applied; never raises.
+
+    Windows uses HIGH_PRIORITY_CLASS rather than REALTIME, which needs admin
+    rights and can starve the very drivers that deliver MIDI. Linux locking
+    needs CAP_IPC_LOCK or a large enough `ulimit -l`. Future mappings are
+    locked too only when that limit is unlimited: under a finite limit, every
+    later mmap (the stacks of threads started after this) would count against
+    it and could fail with "can't start new thread". The MIDI threads raise
+    their own priority with boost_thread_priority(); the process scheduling
+    policy is left alone so the Stockfish child doesn't inherit SCHED_FIFO.
+    """
+    try:
+        if sys.platform == "win32":
+            kernel32 = ctypes.windll.kernel32
+            return bool(kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), _HIGH_PRIORITY_CLASS))
+
+        if sys.platform.startswith("linux"):
+            import resource
+
+            flags = _MCL_CURRENT
+            if resource.getrlimit(resource.RLIMIT_MEMLOCK)[0] == resource.RLIM_INFINITY:
+                flags |= _MCL_FUTURE
+
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            return libc.mlockall(flags) == 0
+    except (OSError, AttributeError):
+        pass
+
+    return False
+
+
+def boost_thread_priority() -> None:
+    """Best effort: raise the calling thread's scheduling priority."""
+    try:
+        if sys.platform == "win32":
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _THREAD_PRIORITY_HIGHEST)
+        elif hasattr(os, "sched_setscheduler"):
+            # Linux applies this to the calling thread; needs CAP_SYS_NICE.
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(80))
+    except (OSError, AttributeError):
+        pass
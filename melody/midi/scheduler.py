@@ -0,0 +1,142 @@
+"""Persistent MIDI output thread that sends timestamped schedules on deadline."""
+
+import threading
+import time
+from contextlib import AbstractContextManager
+from dataclasses import dataclass, field
+from queue import SimpleQueue
+from typing import Callable, Optional, Sequence, Tuple
+
+import mido
+
+from melody.midi.clock import HEARTBEAT_S, sleep_until
+from melody.midi.realtime import boost_thread_priority
+
+RawMessage = bytes  # one complete MIDI message, e.g. bytes((0x90, note, velocity))
+Schedule = Sequence[Tuple[int, RawMessage]]  # (ns after the schedule's start, message)
+
+
+def _raw_sender(outp: mido.ports.BaseOutput) -> Callable[[RawMessage], None]:
+    """
+    Send raw bytes straight to python-rtmidi when the port is mido's rtmidi
+    backend (no Message encoding per send); otherwise go through mido.
+    """
+    rt = getattr(outp, "_rt", None)
+    if rt is not None:
+        return rt.send_message
+    return lambda data: outp.send(mido.Message.from_bytes(data))
+
+
+@dataclass(slots=True)
+class _Job:
+    schedule: Schedule
+    start_ns: int
+    done: threading.Event = field(default_factory=threading.Event)
+    error: Optional[BaseException] = None
+
+
+class MidiScheduler(AbstractContextManager):
+    """
+    Own an output port and send schedules from one long-lived thread.
+
+    Each schedule is a pre-encoded sequence of (offset_ns, raw message bytes)
+    played from an absolute time.perf_counter_ns() start, so one schedule can
+    be reused for every performance. The thread sleeps to the next deadline,
+    then sends every message already due in one burst, so Python work on the
+    main thread (GC, decoding, engine I/O) never sits between a deadline and
+    its send. The thread asks for a raised priority on start (best effort).
+
+    A schedule never starts before the previous one queued has ended, so a
+    schedule queued behind others is delayed whole rather than bunched up.
+    submit() and play() are meant to be called from one thread.
+    """
+
+    def __init__(self, outp: mido.ports.BaseOutput):
+        self._outp = outp
+        self._jobs: SimpleQueue = SimpleQueue()
+        self._error: Optional[BaseException] = None  # from a job nobody waited on
+        self._busy_until_ns = 0  # end of the last queued schedule
+        self._thread = threading.Thread(target=self._run, name="midi-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        schedule: Schedule,
+        start_ns: int,
+        length_ns: Optional[int] = None,
+    ) -> int:
+        """
+        Queue a schedule to start at `start_ns`, or when the last queued one
+        ends (`length_ns` after its start; default: its last message), if later.
+        Returns the start actually used. A send error is raised by the next
+        submit() or play().
+        """
+        return self._enqueue(schedule, start_ns, length_ns).start_ns
+
+    def play(
+        self,
+        schedule: Schedule,
+        start_ns: int,
+        length_ns: Optional[int] = None,
+    ) -> int:
+        """Like submit(), but wait until the schedule's last message is out."""
+        job = self._enqueue(schedule, start_ns, length_ns)
+        while not job.done.wait(HEARTBEAT_S):
+            pass
+        if job.error is not None:
+            self._error = None  # reported here, not again later
+            raise job.error
+        return job.start_ns
+
+    def _enqueue(self, schedule: Schedule, start_ns: int, length_ns: Optional[int]) -> _Job:
+        self._raise_pending()
+        if length_ns is None:
+            length_ns = schedule[-1][0] if schedule else 0
+        start_ns = max(start_ns, self._busy_until_ns)
+        self._busy_until_ns = start_ns + length_ns
+
+        job = _Job(schedule, start_ns)
+        self._jobs.put(job)
+        return job
+
+    def _raise_pending(self) -> None:
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _run(self) -> None:
+        boost_thread_priority()
+        send = _raw_sender(self._outp)
+
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+
+            schedule, start = job.schedule, job.start_ns
+            i, n = 0, len(schedule)
+            try:
+                while i < n:
+                    sleep_until(start + schedule[i][0])
+                    # Burst: everything due by now goes out back to back.
+                    elapsed = time.perf_counter_ns() - start
+                    while i < n and schedule[i][0] <= elapsed:
+                        send(schedule[i][1])
+                        i += 1
+            except Exception as exc:  # noqa: BLE001
+                job.error = self._error = exc
+            finally:
+                job.done.set()
+
+    def close(self) -> None:
+        """Finish queued schedules, then stop the thread."""
+        if self._thread.is_alive():
+            self._jobs.put(None)
+            self._thread.join()
+
+    # Context manager support
+    def __enter__(self) -> "MidiScheduler":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,11 @@
+"""MIDI channel-voice status bytes and the event tuple shared by input and output."""
+
+from typing import Tuple
+
+# Channel-voice status nibbles (status & 0xF0) and the sustain pedal controller
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+CONTROL_CHANGE = 0xB0
+SUSTAIN_PEDAL = 64
+
+MidiEvent = Tuple[int, int, int, int]  # (arrival perf_counter_ns, status & 0xF0, data1, data2)
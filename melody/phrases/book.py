@@ -0,0 +1,43 @@
+"""Engine phrases rendered once per session: every square, castling and promotion."""
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import chess
+
+from melody.key_ctx import KeyContext
+from melody.midi.playback import Rendered, render_degrees
+from melody.phrases.encode import phrase_for_castling, phrase_for_promotion, phrase_for_square
+
+PROMOTION_PIECES = "qrbn"
+
+
+@dataclass(slots=True)
+class PhraseBook:
+    """Pre-encoded note events for every phrase the engine can play."""
+
+    squares: Dict[Tuple[str, bool], Rendered]     # (square name, side_white)
+    castling: Dict[Tuple[bool, bool], Rendered]   # (side_white, kingside)
+    promotion: Dict[Tuple[str, bool], Rendered]   # (piece char, side_white)
+
+
+def build_phrase_book(ctx: KeyContext, channel: int = 0) -> PhraseBook:
+    """Render all 128 square, 4 castling and 8 promotion phrases for `ctx`."""
+    sides = (True, False)
+    return PhraseBook(
+        squares={
+            (sq, side): render_degrees(ctx, phrase_for_square(sq, side), channel)
+            for sq in chess.SQUARE_NAMES
+            for side in sides
+        },
+        castling={
+            (side, kingside): render_degrees(ctx, phrase_for_castling(side, kingside), channel)
+            for side in sides
+            for kingside in (True, False)
+        },
+        promotion={
+            (piece, side): render_degrees(ctx, phrase_for_promotion(piece, side), channel)
+            for piece in PROMOTION_PIECES
+            for side in sides
+        },
+    )
@@ -1,43 +1,34 @@
 """Canonicalization for White/Black phrases (anchors and closures)."""
 
-from typing import List, Tuple
+from melody.key_ctx import Phrase
 
-Degree = Tuple[int, int]  # (degree, alteration)
 
-
-def canonicalize_white(degrees: List[Degree]) -> List[Degree]:
+def canonicalize(phrase: Phrase, anchor: int, mordent_mid: int) -> Phrase:
     """
-    White phrases must start on 1. If a trailing 1 is just a closure beyond
-    the minimal identity (≥4 structural degrees), drop it — unless the phrase
-    begins with the A-file mordent [1,7,1,...].
+    Phrases must start on `anchor` (1 for White, 8 for Black). If a trailing
+    anchor is just a closure beyond the minimal identity (≥4 structural
+    degrees), drop it — unless the phrase begins with the file mordent
+    [anchor, mordent_mid, anchor, ...].
     """
-    if not degrees or degrees[0][0] != 1:
-        return []
-
-    cleaned = degrees[:]
-    has_a_mordent = len(cleaned) >= 3 and cleaned[1][0] == 7 and cleaned[2][0] == 1
-    trailing_closure = len(cleaned) >= 4 and cleaned[-1][0] == 1
+    if not phrase or phrase[0] >> 2 != anchor:
+        return b""
 
-    if trailing_closure and not has_a_mordent:
-        cleaned.pop()
+    has_mordent = (
+        len(phrase) >= 3 and phrase[1] >> 2 == mordent_mid and phrase[2] >> 2 == anchor
+    )
+    trailing_closure = len(phrase) >= 4 and phrase[-1] >> 2 == anchor
 
-    return cleaned
+    if trailing_closure and not has_mordent:
+        return phrase[:-1]
 
+    return phrase
 
-def canonicalize_black(degrees: List[Degree]) -> List[Degree]:
-    """
-    Black phrases must start on 8. If a trailing 8 is just a closure beyond
-    the minimal identity (≥4 structural degrees), drop it — unless the phrase
-    begins with the H-file forward mordent [8,2,8,...].
-    """
-    if not degrees or degrees[0][0] != 8:
-        return []
 
-    cleaned = degrees[:]
-    has_h_mordent = len(cleaned) >= 3 and cleaned[1][0] == 2 and cleaned[2][0] == 8
-    trailing_closure = len(cleaned) >= 4 and cleaned[-1][0] == 8
+def canonicalize_white(phrase: Phrase) -> Phrase:
+    """White: anchor 1, A-file mordent [1,7,1,...]."""
+    return canonicalize(phrase, anchor=1, mordent_mid=7)
 
-    if trailing_closure and not has_h_mordent:
-        cleaned.pop()
 
-    return cleaned
+def canonicalize_black(phrase: Phrase) -> Phrase:
+    """Black: anchor 8, H-file forward mordent [8,2,8,...]."""
+    return canonicalize(phrase, anchor=8, mordent_mid=2)
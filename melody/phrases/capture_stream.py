@@ -1,44 +1,37 @@
-"""Phrase capture from a non-blocking MIDI message stream (queue-backed)."""
+"""Phrase capture from a queue-backed MIDI event stream."""
 
 import time
-from typing import List, Tuple, Optional
+from typing import Callable, Generator, Optional
 
-import mido
+from melody.key_ctx import KeyContext, Phrase
+from melody.midi.status import CONTROL_CHANGE, NOTE_ON, SUSTAIN_PEDAL, MidiEvent
 
-from melody.key_ctx import KeyContext
+# get_msg(timeout=None): the next event, or None on timeout / once closed
+GetMsg = Callable[..., Optional[MidiEvent]]
 
-Degree = Tuple[int, int]  # (degree, alteration)
 
-
-def _collapse_with_final_repeat(raw: List[Degree]) -> List[Degree]:
+def _streamed_append(collapsed: bytearray, step: int) -> bool:
     """
-    Collapse consecutive duplicate degrees, but keep ONE extra copy at the end
-    if the phrase intentionally ends on a repeated degree.
+    Append a packed step unless it repeats the last degree (step >> 2).
+    Returns True when the note was a repeat, i.e. the phrase so far ends on
+    a repeated degree and keeps ONE extra copy at the boundary.
     """
-    if not raw:
-        return []
-
-    collapsed: List[Degree] = [raw[0]]
-    for deg, alt in raw[1:]:
-        if collapsed[-1][0] != deg:
-            collapsed.append((deg, alt))
-
-    if len(raw) >= 2 and raw[-1][0] == raw[-2][0]:
-        if not (len(collapsed) >= 2 and collapsed[-1][0] == collapsed[-2][0]):
-            collapsed.append(collapsed[-1])
+    if collapsed and collapsed[-1] >> 2 == step >> 2:
+        return True
+    collapsed.append(step)
+    return False
 
-    return collapsed
 
-
-def collect_structural_phrase_stream(
-    get_msg,
+def iter_phrases(
+    get_msg: GetMsg,
     ctx: KeyContext,
     min_structural: int = 3,
     use_sustain: bool = True,
-    poll_timeout: float = 0.10,
-) -> List[Degree]:
+) -> Generator[Phrase, Optional[int], None]:
     """
-    Collect a phrase by polling a message source (e.g., MidiListener.get).
+    Yield successive phrases from an event source (e.g., MidiListener.get)
+    that yields (arrival_ns, status, data1, data2) tuples stamped on arrival;
+    get_msg(timeout=None) blocks, and returns None once the source is closed.
 
     Boundaries:
       - With sustain (CC64): hold while playing; releasing ends the phrase
@@ -46,34 +39,67 @@ def collect_structural_phrase_stream(
       - Without sustain: a silence > `ctx.phrase_gap_ms` ends the phrase
         after `min_structural`.
 
-    The function never blocks on I/O; it polls regularly so Ctrl+C is responsive.
+    Each phrase is the structural phrase as packed steps (see
+    key_ctx.pack_step). One reader serves a whole turn, so pedal state and
+    setup carry over between phrases; .send(n) fetches the next phrase with
+    `min_structural` set to n from then on.
+
+    Waits block until the next event; in pedal-less mode the wait after a
+    note ends at that note's gap deadline.
+    Raises EOFError if the source is closed mid-phrase.
     """
-    raw: List[Degree] = []
-    last_note_time: Optional[float] = None
+    gap_ns = ctx.phrase_gap_ns
+    step_of: Callable[[int], int] = ctx.step_of
     sustain_down = False
 
     while True:
-        msg = get_msg(timeout=poll_timeout)
-        now = time.perf_counter()
-
-        if msg is None:
-            # Check gap timeout in pedal-less mode
-            if not use_sustain and last_note_time is not None:
-                gap_ms = (now - last_note_time) * 1000.0
-                if gap_ms > ctx.phrase_gap_ms:
-                    collapsed = _collapse_with_final_repeat(raw)
-                    if len(collapsed) >= min_structural:
-                        return collapsed
-            continue
-
-        if msg.type == "control_change" and msg.control == 64:
-            sustain_down = msg.value >= 64
-            if use_sustain and not sustain_down:
-                collapsed = _collapse_with_final_repeat(raw)
-                if len(collapsed) >= min_structural:
-                    return collapsed
-
-        elif msg.type == "note_on" and msg.velocity > 0:
-            degree, alt = ctx.degree_of(msg.note)
-            raw.append((degree, alt))
-            last_note_time = now
+        collapsed = bytearray()  # packed steps, consecutive duplicates dropped
+        final_repeat = False     # last note repeated the previous degree
+        gap_deadline_ns: Optional[int] = None  # pedal-less: phrase may end after this
+
+        while True:
+            timeout = None
+            if gap_deadline_ns is not None:
+                timeout = max(0.0, (gap_deadline_ns - time.perf_counter_ns()) / 1e9)
+
+            event = get_msg(timeout=timeout)
+
+            if event is None:
+                if timeout is None:
+                    raise EOFError("MIDI input closed")
+
+                # Gap timeout in pedal-less mode
+                if time.perf_counter_ns() > gap_deadline_ns:
+                    gap_deadline_ns = None  # too short: wait for the next note
+                    if len(collapsed) + final_repeat >= min_structural:
+                        break
+                continue
+
+            arrival_ns, status, data1, data2 = event
+
+            # Note-ons are the common case; test them first.
+            if status == NOTE_ON:
+                if data2 > 0:
+                    final_repeat = _streamed_append(collapsed, step_of(data1))
+                    if not use_sustain:
+                        gap_deadline_ns = arrival_ns + gap_ns
+
+            elif status == CONTROL_CHANGE and data1 == SUSTAIN_PEDAL:
+                sustain_down = data2 >= 64
+                if use_sustain and not sustain_down:
+                    if len(collapsed) + final_repeat >= min_structural:
+                        break
+
+        sent = yield bytes(collapsed + collapsed[-1:] if final_repeat else collapsed)
+        if sent is not None:
+            min_structural = sent
+
+
+def collect_structural_phrase_stream(
+    get_msg: GetMsg,
+    ctx: KeyContext,
+    min_structural: int = 3,
+    use_sustain: bool = True,
+) -> Phrase:
+    """Collect a single phrase; see iter_phrases for boundaries and return value."""
+    return next(iter_phrases(get_msg, ctx, min_structural, use_sustain))
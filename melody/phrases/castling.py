@@ -1,11 +1,13 @@
 """Castling motif detection."""
 
-from typing import List, Optional, Tuple
+from typing import Optional
 
-Degree = Tuple[int, int]  # (degree, alteration)
+from melody.key_ctx import Phrase, pack_step
 
+_SHARP_4 = pack_step(4, +1)
 
-def detect_castling_motif(degrees: List[Degree]) -> Optional[str]:
+
+def detect_castling_motif(degrees: Phrase) -> Optional[str]:
     """
     Detect the castling prelude for either color:
 
@@ -17,17 +19,13 @@ def detect_castling_motif(degrees: List[Degree]) -> Optional[str]:
     if len(degrees) < 3:
         return None
 
-    d1, _ = degrees[0]
-    d2, a2 = degrees[1]
-    d3, _ = degrees[2]
-
-    if d1 not in (1, 8):
-        return None
-    if not (d2 == 4 and a2 == +1 and d3 == 5):
+    if not (
+        degrees[0] >> 2 in (1, 8) and degrees[1] == _SHARP_4 and degrees[2] >> 2 == 5
+    ):
         return None
 
     if len(degrees) >= 4:
-        d4, _ = degrees[3]
+        d4 = degrees[3] >> 2
         if d4 > 5:
             return "kingside"
         if d4 < 5:
@@ -1,46 +1,70 @@
 """Decoding of start/landing square phrases for White and Black."""
 
-from typing import List, Optional, Tuple
+from typing import NamedTuple, Optional
 
-from melody.phrases.canonical import canonicalize_white, canonicalize_black
+from melody.key_ctx import Phrase
+from melody.phrases.canonical import canonicalize
 
-Degree = Tuple[int, int]  # (degree, alteration)
+# Degree (1..8) → file letter; index 0 is unused
+FILE_FROM_DEGREE: tuple[Optional[str], ...] = (None, "a", "b", "c", "d", "e", "f", "g", "h")
 
-FILE_FROM_DEGREE: dict[int, str] = {
-    1: "a", 2: "b", 3: "c", 4: "d",
-    5: "e", 6: "f", 7: "g", 8: "h",
+
+class _SideGrammar(NamedTuple):
+    """Per-color square grammar; fields are used as `match` value patterns."""
+
+    anchor: int
+    mordent_file: int
+    mordent_mid: int
+
+
+_DECODE_TABLE: dict[bool, _SideGrammar] = {
+    True: _SideGrammar(1, 1, 7),    # A-file mordent [1, 7, 1, <rank>]
+    False: _SideGrammar(8, 8, 2),   # H-file mordent [8, 2, 8, <rank>]
 }
 
+# Packed step → degree, for bytes.translate()
+_DEGREES = bytes(step >> 2 for step in range(256))
+
 
-def _decode_square_common(
-    seq: List[Degree],
-    short_form_ok: bool,
-    file_deg: int | None,
-    rank_index: int,
+def decode_square(
+    degrees: Phrase,
+    side_white: bool,
+    short_form_ok: bool = False,
 ) -> Optional[str]:
     """
-    Common tail for square decoding. `file_deg` may already be fixed by
-    a file signature (A/H). Otherwise, it's the second degree in the phrase.
+    Decode a square phrase for either color using its row in `_DECODE_TABLE`:
+      File mordent:     [anchor, mordent_mid, anchor, <rank>]   (require 4+)
+      Else:             [anchor, file, <rank...>]
+
+    Landing short-form:
+      If `short_form_ok` and only [anchor, file], interpret rank=file.
+
+    The other edge file (White H = [1, 8, ...], Black A = [8, 1, ...]) is
+    covered by the general form: its second degree is the file.
     """
-    if file_deg is None:
-        file_deg = seq[1][0]
-
-    if len(seq) >= rank_index + 1:
-        rank_deg = seq[-1][0]
-    elif short_form_ok:
-        rank_deg = file_deg
-    else:
-        return None
+    g = _DECODE_TABLE[side_white]
+    seq = canonicalize(degrees, g.anchor, g.mordent_mid)
+
+    match list(seq.translate(_DEGREES)):
+        case [_, g.mordent_mid, g.anchor, *_, rank_deg]:
+            file_deg = g.mordent_file
+        case [_, file_deg]:
+            if not short_form_ok:
+                return None
+            rank_deg = file_deg
+        case [_, file_deg, *_, rank_deg]:
+            pass
+        case _:
+            return None
 
     if not (1 <= rank_deg <= 8):
         return None
 
-    file_letter = FILE_FROM_DEGREE[file_deg]
-    return f"{file_letter}{rank_deg}"
+    return f"{FILE_FROM_DEGREE[file_deg]}{rank_deg}"
 
 
 def decode_white_square(
-    degrees: List[Degree],
+    degrees: Phrase,
     short_form_ok: bool = False,
 ) -> Optional[str]:
     """
@@ -48,28 +72,12 @@ def decode_white_square(
       A-file: [1, 7, 1, <rank>]   (require 4+ to avoid colliding with g1)
       H-file: [1, 8, <rank...>]
       Else:   [1, file, <rank...>]
-
-    Landing short-form:
-      If `short_form_ok` and only [1, file], interpret rank=file.
     """
-    seq = canonicalize_white(degrees)
-    if len(seq) < 2:
-        return None
-
-    # A-file mordent (explicit rank required)
-    if len(seq) >= 4 and seq[1][0] == 7 and seq[2][0] == 1:
-        return _decode_square_common(seq, False, file_deg=1, rank_index=3)
-
-    # H-file octave
-    if seq[1][0] == 8:
-        return _decode_square_common(seq, short_form_ok, file_deg=8, rank_index=2)
-
-    # Normal ([1, file, rank...])
-    return _decode_square_common(seq, short_form_ok, file_deg=None, rank_index=2)
+    return decode_square(degrees, True, short_form_ok)
 
 
 def decode_black_square(
-    degrees: List[Degree],
+    degrees: Phrase,
     short_form_ok: bool = False,
 ) -> Optional[str]:
     """
@@ -77,21 +85,5 @@ def decode_black_square(
       H-file: [8, 2, 8, <rank>]   (forward mordent; require 4+)
       A-file: [8, 1, <rank...>]
       Else:   [8, file, <rank...>]
-
-    Landing short-form:
-      If `short_form_ok` and only [8, file], interpret rank=file.
     """
-    seq = canonicalize_black(degrees)
-    if len(seq) < 2:
-        return None
-
-    # H-file forward mordent (explicit rank required)
-    if len(seq) >= 4 and seq[1][0] == 2 and seq[2][0] == 8:
-        return _decode_square_common(seq, False, file_deg=8, rank_index=3)
-
-    # A-file octave flip
-    if seq[1][0] == 1:
-        return _decode_square_common(seq, short_form_ok, file_deg=1, rank_index=2)
-
-    # Normal ([8, file, rank...])
-    return _decode_square_common(seq, short_form_ok, file_deg=None, rank_index=2)
+    return decode_square(degrees, False, short_form_ok)
@@ -1,16 +1,43 @@
-"""Encoding of squares, castling, and promotion as degree sequences."""
+"""
+Encoding of squares, castling, and promotion as degree sequences.
 
-from typing import List, Tuple
+Each encoder is pure over a tiny domain (128 squares, 4 castlings,
+8 promotions), so results are memoized and returned as shared, packed
+phrases (see key_ctx.pack_step).
+"""
 
-Degree = Tuple[int, int]  # (degree, alteration)
+from functools import lru_cache
 
-DEGREE_FROM_FILE = {
-    "a": 1, "b": 2, "c": 3, "d": 4,
-    "e": 5, "f": 6, "g": 7, "h": 8,
+from melody.key_ctx import Phrase, pack_phrase, pack_step
+
+# File letter → degree is ord(letter) - _FILE_BASE ("a" → 1 … "h" → 8)
+_FILE_BASE = ord("a") - 1
+
+
+def _file_prefix(side_white: bool, file_deg: int) -> Phrase:
+    """Anchor + file signature: the part of a square phrase before its rank."""
+    if side_white:
+        if file_deg == 1:
+            return pack_phrase(((1, 0), (7, 0), (1, 0)))
+        if file_deg == 8:
+            return pack_phrase(((1, 0), (8, 0)))
+        return pack_phrase(((1, 0), (file_deg, 0)))
+
+    if file_deg == 8:
+        return pack_phrase(((8, 0), (2, 0), (8, 0)))
+    if file_deg == 1:
+        return pack_phrase(((8, 0), (1, 0)))
+    return pack_phrase(((8, 0), (file_deg, 0)))
+
+
+# side_white → static prefixes indexed by file degree (index 0 unused)
+_FILE_PREFIX: dict[bool, tuple[Phrase, ...]] = {
+    side: (b"",) + tuple(_file_prefix(side, f) for f in range(1, 9)) for side in (True, False)
 }
 
 
-def phrase_for_square(square: str, side_white: bool) -> List[Degree]:
+@lru_cache(maxsize=None)
+def phrase_for_square(square: str, side_white: bool) -> Phrase:
     """
     Minimal identifying degree sequence for a single square.
 
@@ -24,37 +51,25 @@ def phrase_for_square(square: str, side_white: bool) -> List[Degree]:
       A-file: [8, 1,    rank]
       Else:   [8, file, rank]
     """
-    file_letter = square[0]
-    rank_digit = int(square[1])
-    file_deg = DEGREE_FROM_FILE[file_letter]
-
-    if side_white:
-        if file_letter == "a":
-            return [(1, 0), (7, 0), (1, 0), (rank_digit, 0)]
-        if file_letter == "h":
-            return [(1, 0), (8, 0), (rank_digit, 0)]
-        return [(1, 0), (file_deg, 0), (rank_digit, 0)]
-
-    if file_letter == "h":
-        return [(8, 0), (2, 0), (8, 0), (rank_digit, 0)]
-    if file_letter == "a":
-        return [(8, 0), (1, 0), (rank_digit, 0)]
-    return [(8, 0), (file_deg, 0), (rank_digit, 0)]
+    file_deg = ord(square[0]) - _FILE_BASE
+    return _FILE_PREFIX[side_white][file_deg] + bytes((pack_step(int(square[1])),))
 
 
-def phrase_for_castling(side_white: bool, kingside: bool) -> List[Degree]:
+@lru_cache(maxsize=None)
+def phrase_for_castling(side_white: bool, kingside: bool) -> Phrase:
     """
     Castling prelude for both colors:
       anchor (1 or 8), then #4 (4,+1), then 5,
       then a short run (upwards for kingside, downwards for queenside).
     """
     anchor = 1 if side_white else 8
-    prelude = [(anchor, 0), (4, +1), (5, 0)]
-    run = [(6, 0), (7, 0)] if kingside else [(4, 0), (3, 0)]
-    return prelude + run
+    prelude = ((anchor, 0), (4, +1), (5, 0))
+    run = ((6, 0), (7, 0)) if kingside else ((4, 0), (3, 0))
+    return pack_phrase(prelude + run)
 
 
-def phrase_for_promotion(piece: str, side_white: bool) -> List[Degree]:
+@lru_cache(maxsize=None)
+def phrase_for_promotion(piece: str, side_white: bool) -> Phrase:
     """
     Promotion phrase after landing on last rank.
 
@@ -72,7 +87,6 @@ def phrase_for_promotion(piece: str, side_white: bool) -> List[Degree]:
     target_step = {"r": 1, "n": 2, "b": 3, "q": 4}[piece]
     anchor = 1 if side_white else 8
 
-    seq: List[Degree] = [(anchor, 0), (2, -1)]  # Cue
-    steps = [(1, 0), (2, -1), (3, -1), (3, 0)]
-    seq.extend(steps[:target_step])
-    return seq
+    cue = ((anchor, 0), (2, -1))
+    steps = ((1, 0), (2, -1), (3, -1), (3, 0))
+    return pack_phrase(cue + steps[:target_step])
@@ -1,11 +1,24 @@
 """Promotion identification phrase decoding (tetrachord steps)."""
 
-from typing import List, Optional, Tuple
+from typing import Optional
 
-Degree = Tuple[int, int]  # (degree, alteration)
+from melody.key_ctx import Phrase, pack_step
 
+_FLAT_2 = pack_step(2, -1)
 
-def decode_promotion_piece(degrees: List[Degree]) -> Optional[str]:
+# Packed step → tetrachord step number; a 256-byte table for bytes.translate()
+_PROMO_STEPS = {
+    pack_step(1, 0): 1,
+    _FLAT_2: 2,
+    pack_step(3, -1): 3,
+    pack_step(3, 0): 4,
+}
+_PROMO_LUT = bytes(_PROMO_STEPS.get(b, 0) for b in range(256))
+
+_PIECE_BY_STEP = (None, "r", "n", "b", "q")
+
+
+def decode_promotion_piece(degrees: Phrase) -> Optional[str]:
     """
     Decode the promotion identification phrase (after landing on last rank).
 
@@ -23,23 +36,7 @@ def decode_promotion_piece(degrees: List[Degree]) -> Optional[str]:
     if len(degrees) < 2:
         return None
 
-    d1, _ = degrees[0]
-    d2, a2 = degrees[1]
-
-    if d1 not in (1, 8):
-        return None
-    if not (d2 == 2 and a2 == -1):
+    if degrees[0] >> 2 not in (1, 8) or degrees[1] != _FLAT_2:
         return None
 
-    step_max = 0
-    for d, a in degrees:
-        if (d, a) == (1, 0):
-            step_max = max(step_max, 1)
-        elif (d, a) == (2, -1):
-            step_max = max(step_max, 2)
-        elif (d, a) == (3, -1):
-            step_max = max(step_max, 3)
-        elif (d, a) == (3, 0):
-            step_max = max(step_max, 4)
-
-    return {1: "r", 2: "n", 3: "b", 4: "q"}.get(step_max)
+    return _PIECE_BY_STEP[max(degrees.translate(_PROMO_LUT))]